@@ -8,6 +8,9 @@ import os
 import sys
 from dotenv import load_dotenv
 import logging
+import shutil
+import tempfile
+import threading
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
@@ -25,6 +28,10 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+CHROMA_PERSIST_DIRECTORY = "./chroma_db"
+COURSE_DB_SENTINEL = os.path.join(CHROMA_PERSIST_DIRECTORY, ".populated")
+
 # Page configuration
 st.set_page_config(
     page_title="AI Course Matching System",
@@ -33,39 +40,94 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(show_spinner=False)
 def initialize_system():
-    """Initialize all system components"""
-    try:
-        # Initialize databases
-        profiles_db = ProfilesDatabase("profiles.db")
-        course_db = CourseDatabase("./chroma_db")
-        
-        # Check if course database is empty and populate with sample data
-        stats = course_db.get_database_stats()
+    """Initialize all system components once per process and share them across sessions"""
+    # Initialize databases
+    profiles_db = ProfilesDatabase("profiles.db")
+    course_db = CourseDatabase(CHROMA_PERSIST_DIRECTORY)
+    
+    # Initialize parsers and recommender
+    resume_parser = ResumeParser()
+    url_adapter = URLProfileAdapter()
+    multi_extractor = MultiProfileExtractor()
+    recommender = CourseRecommender(profiles_db, course_db)
+    
+    return {
+        'profiles_db': profiles_db,
+        'course_db': course_db,
+        'resume_parser': resume_parser,
+        'url_adapter': url_adapter,
+        'multi_extractor': multi_extractor,
+        'recommender': recommender,
+        # Cached resources are shared by every session (each runs on its own thread), so every database
+        # read and write goes through this lock. The lock serializes access but cannot lift sqlite's
+        # same-thread check: ProfilesDatabase must connect per call or with check_same_thread=False
+        'db_lock': threading.Lock()
+    }
+
+def populate_course_database(system):
+    """Populate the course database with sample courses if it is empty"""
+    # The sentinel lets later startups skip opening the collection just to count it
+    if os.path.exists(COURSE_DB_SENTINEL):
+        return
+    
+    with system['db_lock']:
+        stats = system['course_db'].get_database_stats()
         if stats.get('total_courses', 0) == 0:
             st.info("Initializing course database with sample courses...")
             sample_courses = create_sample_courses()
-            course_db.add_courses_from_list(sample_courses)
+            system['course_db'].add_courses_from_list(sample_courses)
             st.success(f"Added {len(sample_courses)} sample courses to database")
+            _cached_course_stats.clear()
         
-        # Initialize parsers and recommender
-        resume_parser = ResumeParser()
-        url_adapter = URLProfileAdapter()
-        multi_extractor = MultiProfileExtractor()
-        recommender = CourseRecommender(profiles_db, course_db)
-        
-        return {
-            'profiles_db': profiles_db,
-            'course_db': course_db,
-            'resume_parser': resume_parser,
-            'url_adapter': url_adapter,
-            'multi_extractor': multi_extractor,
-            'recommender': recommender
-        }
-        
-    except Exception as e:
-        st.error(f"Error initializing system: {str(e)}")
-        return None
+        open(COURSE_DB_SENTINEL, "w").close()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_get_profiles(_system, limit):
+    """Recent profiles, cached briefly so widget interactions don't rescan SQLite"""
+    with _system['db_lock']:
+        return _system['profiles_db'].get_all_profiles(limit=limit)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_profile_stats(_system):
+    """Profile database statistics, cached briefly"""
+    with _system['db_lock']:
+        return _system['profiles_db'].get_database_stats()
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_course_stats(_system):
+    """Course database statistics, cached briefly"""
+    with _system['db_lock']:
+        return _system['course_db'].get_database_stats()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_search(_system, query, k):
+    """Course search results, memoized on (query, k) so repeat searches skip the embedding + vector query"""
+    with _system['db_lock']:
+        return _system['course_db'].search_similar_courses(query, k=k)
+
+def save_profile(system, profile_data):
+    """Insert a profile and invalidate the cached profile listings"""
+    with system['db_lock']:
+        profile_id = system['profiles_db'].insert_profile(profile_data)
+    _cached_get_profiles.clear()
+    _cached_profile_stats.clear()
+    return profile_id
+
+def parse_uploaded_resume(system, uploaded_file):
+    """Spool an uploaded resume to a unique temp file and parse it"""
+    # Copy in fixed-size chunks rather than materializing the whole buffer, and use a
+    # unique name so concurrent sessions uploading the same filename don't collide
+    uploaded_file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as temp_file:
+        shutil.copyfileobj(uploaded_file, temp_file, UPLOAD_CHUNK_SIZE)
+    
+    try:
+        return system['resume_parser'].parse_resume_file(temp_file.name)
+    finally:
+        # Clean up temp file
+        os.unlink(temp_file.name)
 
 def main():
     """Main application function"""
@@ -85,10 +147,16 @@ def main():
         return
     
     # Initialize system
-    with st.spinner("Initializing AI Course Matching System..."):
-        system = initialize_system()
-    
-    if not system:
+    try:
+        with st.spinner("Initializing AI Course Matching System..."):
+            system = initialize_system()
+        
+        # Only check for an empty course database once per session
+        if not st.session_state.get('course_db_checked'):
+            populate_course_database(system)
+            st.session_state['course_db_checked'] = True
+    except Exception as e:
+        st.error(f"Error initializing system: {str(e)}")
         return
     
     # Sidebar for navigation
@@ -119,14 +187,9 @@ def profile_creation_page(system):
         uploaded_file = st.file_uploader("Choose a PDF resume", type="pdf")
         
         if uploaded_file is not None:
-            # Save uploaded file temporarily
-            temp_path = f"temp_{uploaded_file.name}"
-            with open(temp_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            
             try:
                 with st.spinner("Parsing resume..."):
-                    parsed_data = system['resume_parser'].parse_resume_file(temp_path)
+                    parsed_data = parse_uploaded_resume(system, uploaded_file)
                 
                 st.success("Resume parsed successfully!")
                 
@@ -153,16 +216,11 @@ def profile_creation_page(system):
                     parsed_data['source_type'] = 'resume'
                     
                     # Save to database
-                    profile_id = system['profiles_db'].insert_profile(parsed_data)
+                    profile_id = save_profile(system, parsed_data)
                     st.success(f"Profile saved with ID: {profile_id}")
                 
-                # Clean up temp file
-                os.remove(temp_path)
-                
             except Exception as e:
                 st.error(f"Error parsing resume: {str(e)}")
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
     
     with tab2:
         st.subheader("Extract from URL Profile")
@@ -199,7 +257,7 @@ def profile_creation_page(system):
                     profile_data['profile_summary'] = profile_summary
                     
                     # Save to database
-                    profile_id = system['profiles_db'].insert_profile(profile_data)
+                    profile_id = save_profile(system, profile_data)
                     st.success(f"Profile saved with ID: {profile_id}")
                 
             except Exception as e:
@@ -241,7 +299,7 @@ def profile_creation_page(system):
                     profile_data['profile_summary'] = profile_summary
                     
                     try:
-                        profile_id = system['profiles_db'].insert_profile(profile_data)
+                        profile_id = save_profile(system, profile_data)
                         st.success(f"Profile saved with ID: {profile_id}")
                     except Exception as e:
                         st.error(f"Error saving profile: {str(e)}")
@@ -253,7 +311,7 @@ def recommendations_page(system):
     st.header("🎯 Get Course Recommendations")
     
     # Profile selection
-    profiles = system['profiles_db'].get_all_profiles(limit=50)
+    profiles = _cached_get_profiles(system, 50)
     
     if not profiles:
         st.warning("No profiles found. Please create a profile first.")
@@ -264,6 +322,11 @@ def recommendations_page(system):
     selected_profile_name = st.selectbox("Select a profile:", list(profile_options.keys()))
     selected_profile_id = profile_options[selected_profile_name]
     
+    recommendations_fragment(system, selected_profile_id)
+
+@st.fragment
+def recommendations_fragment(system, selected_profile_id):
+    """Recommendation filters and results; filter changes rerun only this fragment"""
     # Recommendation settings
     col1, col2 = st.columns(2)
     
@@ -302,7 +365,8 @@ def recommendations_page(system):
             filters['category'] = category_filter
         
         try:
-            with st.spinner("Generating personalized recommendations..."):
+            # The recommender reads both shared databases
+            with st.spinner("Generating personalized recommendations..."), system['db_lock']:
                 recommendations = system['recommender'].get_recommendations(
                     selected_profile_id, 
                     max_courses=max_courses, 
@@ -350,16 +414,19 @@ def browse_courses_page(system):
     """Page for browsing available courses"""
     st.header("📖 Browse Courses")
     
-    # Search functionality
-    search_query = st.text_input("Search courses:", placeholder="Enter keywords, skills, or topics")
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        search_limit = st.slider("Number of results", 1, 20, 10)
+    # Search functionality; widgets inside a form only rerun the page on submit
+    with st.form("course_search"):
+        search_query = st.text_input("Search courses:", placeholder="Enter keywords, skills, or topics")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            search_limit = st.slider("Number of results", 1, 20, 10)
+        
+        st.form_submit_button("Search")
     
     if search_query:
         try:
-            results = system['course_db'].search_similar_courses(search_query, k=search_limit)
+            results = _cached_search(system, search_query, search_limit)
             
             st.subheader(f"Search Results ({len(results)} courses)")
             
@@ -396,8 +463,8 @@ def system_stats_page(system):
     
     try:
         # Get database stats
-        profile_stats = system['profiles_db'].get_database_stats()
-        course_stats = system['course_db'].get_database_stats()
+        profile_stats = _cached_profile_stats(system)
+        course_stats = _cached_course_stats(system)
         
         col1, col2 = st.columns(2)
         
@@ -415,7 +482,7 @@ def system_stats_page(system):
         
         # Recent profiles
         st.subheader("Recent Profiles")
-        recent_profiles = system['profiles_db'].get_all_profiles(limit=10)
+        recent_profiles = _cached_get_profiles(system, 10)
         
         if recent_profiles:
             for profile in recent_profiles:
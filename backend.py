@@ -22,17 +22,46 @@
 
 # if embeddings:
 #     print("Embeddings model loaded successfully!")
-from student_ingest import ingest_student_pdf, ingest_student_web
-from course_ingest import ingest_course_pdf
+from student_ingest import ingest_student_pdf, ingest_student_web, ensure_index as ensure_student_index
+from course_ingest import ingest_course_pdf, query_course_pdfs, ensure_index as ensure_course_index
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from io import BytesIO
+from typing import List
 
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Body
 from fastapi.responses import JSONResponse
 
-app= FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Atlas index creation is an admin operation, so it happens once here rather than per upload
+    ensure_student_index()
+    ensure_course_index()
+    yield
+
+app= FastAPI(lifespan=lifespan)
+
+# Ingestion (PDF parsing + embedding) runs on its own bounded pool so it never blocks the event loop.
+# Threads rather than processes: the embedding model and Mongo client are loaded once per process
+# and torch releases the GIL while encoding.
+# Sized for the encoder, not the core count: each encode already runs on cpu_count // 2 intra-op
+# threads (embeddings_singleton), so two concurrent ingests fill the CPU, and on a GPU host they
+# queue on one device anyway. Further uploads wait in the pool's queue. Responses still wait for
+# ingestion to finish; there is no background job/poll API.
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_EXECUTOR = ThreadPoolExecutor(max_workers=INGEST_WORKERS)
+
+
+async def run_ingest(ingest_fn, *args):
+    """Run a blocking ingest function on the ingestion pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(INGEST_EXECUTOR, ingest_fn, *args)
 
 @app.post("/uploadfile/")
-def create_upload_file(file: UploadFile = File(...)):
+async def create_upload_file(file: UploadFile = File(...)):
     if file.content_type != 'application/pdf':
         raise HTTPException(status_code=400, detail="Invalid file type. Only PDF files are accepted.")
     try:
@@ -40,33 +69,52 @@ def create_upload_file(file: UploadFile = File(...)):
         with open(file_location, "wb+") as file_object:
             file_object.write(file.file.read())"""
         # Call the ingest function to process and store the PDF content
-        #store the file as a temp file and pass the path to the ingest function
-        
-        # Ensure temp directory exists
-        os.makedirs("temp", exist_ok=True)
+        #parse the upload straight from memory, no temp file needed
         
-        temp_file_path = f"temp/{file.filename}"
-        with open(temp_file_path, "wb+") as temp_file:
-            temp_file.write(file.file.read())
-        result = ingest_student_pdf(temp_file_path)
+        data = await file.read()
+        result = await run_ingest(ingest_student_pdf, BytesIO(data), file.filename)
         return {"info": f"file '{file.filename}' processed successfully", "details": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while processing the file: {str(e)}")
     
 
 
+@app.post("/uploadfiles/")
+async def create_upload_files(files: List[UploadFile] = File(...)):
+    for file in files:
+        if file.content_type != 'application/pdf':
+            raise HTTPException(status_code=400, detail=f"Invalid file type for '{file.filename}'. Only PDF files are accepted.")
+    try:
+        contents = await asyncio.gather(*[file.read() for file in files])
+        # Ingest every resume in parallel; one failure should not discard the rest of the batch
+        results = await asyncio.gather(
+            *[run_ingest(ingest_student_pdf, BytesIO(data), file.filename) for file, data in zip(files, contents)],
+            return_exceptions=True,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred while processing the files: {str(e)}")
+
+    processed = []
+    for file, result in zip(files, results):
+        if isinstance(result, Exception):
+            processed.append({"file": file.filename, "status": "error", "details": str(result)})
+        else:
+            processed.append({"file": file.filename, "status": "success", "details": result})
+    return {"info": f"{len(files)} files processed", "results": processed}
+
+
 @app.post("/uploadlink/")
-def create_upload_link(link: str):
+async def create_upload_link(link: str):
     try:
         # Call the ingest function to process and store the content from the link
-        result = ingest_student_web(link)
+        result = await run_ingest(ingest_student_web, link)
         return {"info": f"link '{link}' processed successfully", "details": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while processing the link: {str(e)}")
 
 
 @app.post("/uploadcourse/")
-def create_upload_course(file: UploadFile = File(...)):
+async def create_upload_course(file: UploadFile = File(...)):
     if file.content_type != 'application/pdf':
         raise HTTPException(status_code=400, detail="Invalid file type. Only PDF files are accepted.")
     try:
@@ -74,19 +122,32 @@ def create_upload_course(file: UploadFile = File(...)):
         with open(file_location, "wb+") as file_object:
             file_object.write(file.file.read())"""
         # Call the ingest function to process and store the PDF content
-        #store the file as a temp file and pass the path to the ingest function
-        
-        # Ensure temp directory exists
-        os.makedirs("temp", exist_ok=True)
+        #parse the upload straight from memory, no temp file needed
         
-        temp_file_path = f"temp/{file.filename}"
-        with open(temp_file_path, "wb+") as temp_file:
-            temp_file.write(file.file.read())
-        result = ingest_course_pdf(temp_file_path)
+        data = await file.read()
+        result = await run_ingest(ingest_course_pdf, BytesIO(data), file.filename)
         return {"info": f"file '{file.filename}' processed successfully", "details": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while processing the file: {str(e)}")
 
+
+@app.post("/querycourses/")
+async def query_courses(questions: List[str] = Body(...)):
+    try:
+        # Extraction requests to Gemini go out concurrently rather than one brochure at a time;
+        # one failed extraction should not discard the rest of the batch
+        results = await query_course_pdfs(questions)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred while querying courses: {str(e)}")
+
+    processed = []
+    for question, result in zip(questions, results):
+        if isinstance(result, Exception):
+            processed.append({"question": question, "status": "error", "details": str(result)})
+        else:
+            processed.append({"question": question, "status": "success", "details": result})
+    return {"info": f"{len(questions)} queries processed", "results": processed}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+Text splitting shared by the ingest modules
+"""
+
+import logging
+from collections import deque
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+logger = logging.getLogger(__name__)
+
+
+class LengthCachedTextSplitter(RecursiveCharacterTextSplitter):
+    """RecursiveCharacterTextSplitter with a cheaper split step and a merge step that measures each split once
+
+    The stock _merge_splits re-measures the head split every time it slides the overlap
+    window and re-slices the window list on each pop. Here every split is stored with
+    its precomputed length in a deque, so sliding is O(1) and length_function runs once
+    per split (which matters when it is a tokenizer rather than len).
+    """
+
+    def _split_text(self, text, separators):
+        # Literal separators never need the regex engine: `in` finds them and str.split cuts on
+        # them in C, where the stock version escapes, searches and re.splits on every recursion
+        if self._is_separator_regex:
+            return super()._split_text(text, separators)
+
+        final_chunks = []
+        separator = separators[-1]
+        new_separators = []
+        for i, candidate in enumerate(separators):
+            if candidate == "":
+                separator = candidate
+                break
+            if candidate in text:
+                separator = candidate
+                new_separators = separators[i + 1:]
+                break
+
+        splits = self._split_on(text, separator)
+        merge_separator = "" if self._keep_separator else separator
+        good_splits = []
+        for split in splits:
+            if self._length_function(split) < self._chunk_size:
+                good_splits.append(split)
+            else:
+                if good_splits:
+                    final_chunks.extend(self._merge_splits(good_splits, merge_separator))
+                    good_splits = []
+                if not new_separators:
+                    final_chunks.append(split)
+                else:
+                    final_chunks.extend(self._split_text(split, new_separators))
+        if good_splits:
+            final_chunks.extend(self._merge_splits(good_splits, merge_separator))
+        return final_chunks
+
+    def _split_on(self, text, separator):
+        """Same pieces _split_text_with_regex yields for a literal separator, without building a pattern"""
+        if not separator:
+            return list(text)
+        parts = text.split(separator)
+        if self._keep_separator == "end":
+            parts = [part + separator for part in parts[:-1]] + parts[-1:]
+        elif self._keep_separator:
+            parts = parts[:1] + [separator + part for part in parts[1:]]
+        return [part for part in parts if part != ""]
+
+    def _merge_splits(self, splits, separator):
+        separator_len = self._length_function(separator)
+
+        docs = []
+        current_doc = deque()
+        total = 0
+        for split in splits:
+            split_len = self._length_function(split)
+            if total + split_len + (separator_len if current_doc else 0) > self._chunk_size:
+                if total > self._chunk_size:
+                    logger.warning(
+                        f"Created a chunk of size {total}, which is longer than the specified {self._chunk_size}"
+                    )
+                if current_doc:
+                    doc = self._join_docs([text for text, _ in current_doc], separator)
+                    if doc is not None:
+                        docs.append(doc)
+                    # Drop from the front until what remains fits as overlap for the next chunk
+                    while total > self._chunk_overlap or (
+                        total + split_len + (separator_len if current_doc else 0) > self._chunk_size
+                        and total > 0
+                    ):
+                        _, head_len = current_doc.popleft()
+                        total -= head_len + (separator_len if current_doc else 0)
+            current_doc.append((split, split_len))
+            total += split_len + (separator_len if len(current_doc) > 1 else 0)
+
+        doc = self._join_docs([text for text, _ in current_doc], separator)
+        if doc is not None:
+            docs.append(doc)
+        return docs
+
+
+# Stateless between calls, so one instance serves every ingest
+TEXT_SPLITTER = LengthCachedTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+
+def split_pages(pages):
+    """Split pages into chunks as they arrive, so extraction, splitting and embedding overlap"""
+    for page in pages:
+        yield from TEXT_SPLITTER.split_documents([page])
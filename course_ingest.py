@@ -1,48 +1,43 @@
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import HumanMessage, SystemMessage
 
 
-from langchain_huggingface import HuggingFaceEmbeddings
-
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_mongodb import MongoDBAtlasVectorSearch
-from pymongo import MongoClient
-from uuid import uuid4
+import asyncio
+import os
+from functools import lru_cache
+from pdf_cache import load_pdf
+from langchain_mongodb.pipelines import vector_search_stage
+from embeddings_singleton import EMBEDDINGS, MONGO_CLIENT, DB_NAME, bulk_add_documents, bulk_load_documents, ensure_vector_search_index, get_vector_store
+from chunking import split_pages
 from dotenv import load_dotenv
 load_dotenv(override=True)
 from langchain import hub
 
-from typing import Optional
+from typing import IO, Optional, Union
 
 from pydantic import BaseModel, Field
 from langchain_core.documents import Document
-from typing_extensions import List, Annotated, TypedDict
+from typing_extensions import List, TypedDict
 
 # COURSE SCHEMA
-class CourseDetailsDict(TypedDict):
-    courseName: Annotated[str, "Course title as printed in the brochure."]
-    courseDuration: Annotated[int, "Nominal duration in years (integer)."]
-    courseCoreSubjects: Annotated[List[str], "List of mandatory/core subjects."]
-    courseElectives: Annotated[List[str], "List of elective subjects (empty if none listed)."]
-    courseSpecialisations: Annotated[List[str], "Tracks/streams/specialisations offered."]
-    coursePrereqs: Annotated[List[str], "Admission prerequisites and eligibility points."]
-
-
-class InstituteSchemaRequired(TypedDict):
-    institution: Annotated[str, "Official name of the institution."]
-    degrees: Annotated[List[str], "All degrees/programs mentioned in the brochure."]
-    courseDetails: Annotated[CourseDetailsDict, "Primary course block captured from the brochure."]
-    features: Annotated[str, "One-paragraph summary of facilities, curriculum design, and distinctive features."]
-
-
-class InstituteSchemaOptional(TypedDict, total=False):
-    placementRecords: Annotated[str, "Notable placement statistics, recruiters, or salary figures if provided."]
-    awards: Annotated[str, "Awards, accreditations, and notable recognitions if provided."]
-
-
-class InstituteSchema(InstituteSchemaRequired, InstituteSchemaOptional):
+# Pydantic models rather than TypedDicts: the schema is derived once per class, and the model's
+# response is validated by pydantic-core instead of the generic TypedDict adapter
+class CourseDetails(BaseModel):
+    courseName: str = Field(description="Course title as printed in the brochure.")
+    courseDuration: int = Field(description="Nominal duration in years (integer).")
+    courseCoreSubjects: List[str] = Field(description="List of mandatory/core subjects.")
+    courseElectives: List[str] = Field(description="List of elective subjects (empty if none listed).")
+    courseSpecialisations: List[str] = Field(description="Tracks/streams/specialisations offered.")
+    coursePrereqs: List[str] = Field(description="Admission prerequisites and eligibility points.")
+
+
+class Institute(BaseModel):
     """Final schema: required + optional fields combined."""
+    institution: str = Field(description="Official name of the institution.")
+    degrees: List[str] = Field(description="All degrees/programs mentioned in the brochure.")
+    courseDetails: CourseDetails = Field(description="Primary course block captured from the brochure.")
+    features: str = Field(description="One-paragraph summary of facilities, curriculum design, and distinctive features.")
+    placementRecords: Optional[str] = Field(default=None, description="Notable placement statistics, recruiters, or salary figures if provided.")
+    awards: Optional[str] = Field(default=None, description="Awards, accreditations, and notable recognitions if provided.")
 
 
 class State(TypedDict):
@@ -127,24 +122,36 @@ Return only the pure JSON object.
 """
 context=""
 user_prompt=""
-prompt = ChatPromptTemplate.from_messages(
-    [
-        ("system", system_message),
-        ("user", "Here is the document content:\n\n{context}\n\nNow: {question}")
-    ],
-)
+# The system turn never changes, so it is rendered once here (format() only un-escapes the {{ }}
+# around the JSON example) and only the user turn is built per request
+SYSTEM_MESSAGE = SystemMessage(content=system_message.format())
+
+
+def build_messages(context: str, question: str):
+    return [
+        SYSTEM_MESSAGE,
+        HumanMessage(content=f"Here is the document content:\n\n{context}\n\nNow: {question}"),
+    ]
 
 import getpass
-import os
+import sys
 
-if not os.environ.get("GOOGLE_API_KEY"):
-  os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
 
-from langchain.chat_models import init_chat_model
+@lru_cache(maxsize=1)
+def _get_structured_llm():
+    """Gemini client, built on first query so ingest-only imports never prompt for a key or load it"""
+    if not os.environ.get("GOOGLE_API_KEY"):
+        # Only prompt when someone is at a terminal; a server would otherwise block on stdin forever
+        if not sys.stdin.isatty():
+            raise RuntimeError("GOOGLE_API_KEY is not set; add it to the environment or .env to query courses")
+        os.environ["GOOGLE_API_KEY"] = getpass.getpass("Enter API key for Google Gemini: ")
 
-llm = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+    from langchain.chat_models import init_chat_model
 
-structured_llm= llm.with_structured_output(InstituteSchema)
+    llm = init_chat_model("gemini-2.5-flash-lite", model_provider="google_genai")
+    # json_mode binds the schema as Gemini's response_schema (constrained JSON output instead of a tool call)
+    # and parses the reply with PydanticOutputParser; langchain-google-genai 2.1 has no "json_schema" method
+    return llm.with_structured_output(Institute, method="json_mode")
 
 """example_messages = query_prompt_template.invoke(
     {"context": context, "system": system_message, "user": user_prompt}
@@ -153,15 +160,35 @@ structured_llm= llm.with_structured_output(InstituteSchema)
 assert len(example_messages) == 1
 print(example_messages[0].content)"""
 
+@lru_cache(maxsize=32)
+def _embed_query(question: str):
+    # The extraction prompt is a long fixed string, so its embedding is computed once and reused
+    return tuple(EMBEDDINGS.embed_query(question))
+
+
 def retrieve(state: State):
-    retrieved_docs = vector_store.similarity_search(state["question"])
+    query_vector = list(_embed_query(state["question"]))
+    # MongoDBAtlasVectorSearch (langchain-mongodb 0.7) has no public search by vector, so run the same
+    # $vectorSearch stage it builds directly with the cached vector
+    pipeline = [
+        vector_search_stage(query_vector, "embedding", ATLAS_VECTOR_SEARCH_INDEX_NAME, top_k=4),
+        {"$project": {"embedding": 0}},
+    ]
+    retrieved_docs = [
+        Document(page_content=result.pop("text"), metadata=result)
+        for result in MONGODB_COLLECTION.aggregate(pipeline)
+        if "text" in result
+    ]
     return {"context": retrieved_docs}
 
 
+def _format_context(docs):
+    return "\n\n".join(doc.page_content for doc in docs)
+
+
 def generate(state: State):
-    docs_content = "\n\n".join(doc.page_content for doc in state["context"])
-    messages = prompt.invoke({"context": docs_content, "question": state["question"]})
-    response = structured_llm.invoke(messages)
+    messages = build_messages(_format_context(state["context"]), state["question"])
+    response = _get_structured_llm().invoke(messages)
     return {"answer": response}
 
 from langgraph.graph import START, StateGraph
@@ -169,46 +196,36 @@ from langgraph.graph import START, StateGraph
 graph_builder = StateGraph(State).add_sequence([retrieve, generate])
 graph_builder.add_edge(START, "retrieve")
 graph = graph_builder.compile()
-uri=os.getenv("MONGODB_URI")
-client = MongoClient(uri)
-DB_NAME = "college_seeker"
 COLLECTION_NAME = "rawcourse_collection"
 ATLAS_VECTOR_SEARCH_INDEX_NAME = "rawcourse-index-vectorstores"
-MONGODB_COLLECTION = client[DB_NAME][COLLECTION_NAME]
-vector_store = MongoDBAtlasVectorSearch(
-            collection=MONGODB_COLLECTION,
-            embedding=embeddings,
-            index_name=ATLAS_VECTOR_SEARCH_INDEX_NAME,
-            relevance_score_fn="cosine",
-        )
-
-def ingest_course_pdf(file_path):
+MONGODB_COLLECTION = MONGO_CLIENT[DB_NAME][COLLECTION_NAME]
+vector_store = get_vector_store(COLLECTION_NAME, ATLAS_VECTOR_SEARCH_INDEX_NAME)
+
+def ensure_index():
+    """Create the course vector search index if missing; called once at startup, not per ingest"""
+    ensure_vector_search_index(vector_store, ATLAS_VECTOR_SEARCH_INDEX_NAME, dimensions=768)
+
+def ingest_course_pdf(source: Union[str, IO[bytes]], filename: Optional[str] = None, bulk: bool = False):
     try:
-        # Load the PDF file
-        loader = PyPDFLoader(file_path)
-        documents = loader.load()
-        
-        # Split the documents into smaller chunks
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        docs = text_splitter.split_documents(documents)
+        # Load the PDF file; pages are parsed lazily as the pipeline pulls them
+        file_hash, pages = load_pdf(source, filename)
         
-        # Initialize MongoDB client and vector store
+        # Split the pages into smaller chunks, each keyed by the file's content hash
+        chunks = ((f"{file_hash}:{i}", doc) for i, doc in enumerate(split_pages(pages)))
         
+        # Add documents to the vector store; large offline loads skip index maintenance and rebuild once.
+        # bulk drops the shared index (searches and other ingests run without it), so it is not exposed over the API
+        if bulk:
+            count = bulk_load_documents(vector_store, ATLAS_VECTOR_SEARCH_INDEX_NAME, chunks, dimensions=768)
+        else:
+            count = bulk_add_documents(MONGODB_COLLECTION, chunks)
         
-        # Create vector search index on the collection
-        vector_store.create_vector_search_index(dimensions=768)
-        
-        # Add documents to the vector store
-        vector_store.add_documents(docs, ids=[str(uuid4()) for _ in range(len(docs))])
-        
-        return {"status": "success", "message": f"Processed {len(docs)} document chunks."}
+        return {"status": "success", "message": f"Processed {count} document chunks."}
     except Exception as e:
         return {"status": "error", "message": str(e)}
     
     
-def query_course_pdf() -> Optional[InstituteSchema]:
-    result=graph.invoke({
-  "question": """
+COURSE_EXTRACTION_QUESTION = """
 Convert the ENTIRE DOCUMENT to a JSON object that strictly adheres to the following schema:
 
 Schema name: InstituteSchema
@@ -238,10 +255,38 @@ Strict output rules:
 7. courseDuration must be an integer (e.g., 4 for B.Tech, 2 for M.Tech); if unspecified, use 0.
 8. Do not wrap, comment, or explain — return the pure JSON object only.
 """
-})
+
+# Gemini requests in flight at once for batched extraction
+MAX_LLM_CONCURRENCY = 8
+
+
+def query_course_pdf() -> Optional[Institute]:
+    result=graph.invoke({"question": COURSE_EXTRACTION_QUESTION})
     return result['answer']
 
 
+async def query_course_pdfs(questions: List[str]) -> List[Union[Optional[Institute], Exception]]:
+    """Answer several questions with Gemini requests pipelined concurrently instead of one at a time
+
+    Results line up with questions; a question whose retrieval or extraction failed gets its exception.
+    """
+    # Retrieval is blocking Mongo I/O; run it off the event loop, one thread per question
+    results = await asyncio.gather(
+        *(asyncio.to_thread(retrieve, {"question": question}) for question in questions),
+        return_exceptions=True,
+    )
+    retrieved = [i for i, state in enumerate(results) if not isinstance(state, Exception)]
+    messages = [build_messages(_format_context(results[i]["context"]), questions[i]) for i in retrieved]
+    # First use builds the client (and may prompt for the key), which must not block the event loop
+    structured_llm = await asyncio.to_thread(_get_structured_llm)
+    answers = await structured_llm.abatch(
+        messages, config={"max_concurrency": MAX_LLM_CONCURRENCY}, return_exceptions=True
+    )
+    for i, answer in zip(retrieved, answers):
+        results[i] = answer
+    return results
+
+
 
 
 #print(query_course_pdf())
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""
+Shared embedding model and MongoDB client for the ingest modules
+
+course_ingest.py and student_ingest.py both import from here, so the mpnet
+weights are loaded and the Mongo connection pool is opened once per process.
+"""
+
+import logging
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+# OpenMP/MKL size their thread pools when torch loads, so this has to happen before the import.
+# Containers often report a misleading default; roughly one thread per physical core is the
+# usual sweet spot for encoder inference. Explicit values in the environment still win
+_INTRA_OP_THREADS = str(max(1, (os.cpu_count() or 2) // 2))
+os.environ.setdefault("OMP_NUM_THREADS", _INTRA_OP_THREADS)
+os.environ.setdefault("MKL_NUM_THREADS", _INTRA_OP_THREADS)
+os.environ.setdefault("KMP_AFFINITY", "granularity=fine,compact,1,0")
+
+import torch
+from bson.binary import Binary, BinaryVectorDtype
+from dotenv import load_dotenv
+from filelock import FileLock
+from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_mongodb import MongoDBAtlasVectorSearch
+from pymongo import MongoClient, ReplaceOne, WriteConcern
+from pymongo.operations import SearchIndexModel
+
+load_dotenv(override=True)
+
+logger = logging.getLogger(__name__)
+
+
+def _omp_thread_count():
+    """Outer-level thread count from OMP_NUM_THREADS, which may list nested levels ("4,2")"""
+    try:
+        return max(1, int(os.environ.get("OMP_NUM_THREADS", "").split(",")[0]))
+    except ValueError:
+        return int(_INTRA_OP_THREADS)
+
+
+torch.set_num_threads(_omp_thread_count())
+try:
+    torch.set_num_interop_threads(2)
+except RuntimeError:
+    # Only settable once per process, before any inter-op work has started
+    pass
+
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+ONNX_MODEL_DIR = os.getenv("EMBEDDINGS_ONNX_DIR", "./mpnet-onnx-int8")
+# "fastembed" swaps sentence-transformers for fastembed's bundled ONNX mpnet on onnxruntime
+EMBEDDINGS_BACKEND = os.getenv("EMBEDDINGS_BACKEND", "")
+DB_NAME = "college_seeker"
+# Chunks embedded and written per pipeline step (several encode batches of 64)
+WRITE_BATCH_SIZE = 256
+
+
+def _load_embeddings():
+    """Load the embedding model: fp16 on GPU when available, else the int8 ONNX export or int8 torch on CPU"""
+    if EMBEDDINGS_BACKEND == "fastembed":
+        # Same model and 768-dim output, so existing vectors and the Atlas index stay valid. Imported
+        # here because fastembed is an optional dependency
+        from fastembed import TextEmbedding
+        from fastembed.common.model_description import ModelSource, PoolingType
+        from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+
+        # all-mpnet-base-v2 is not in fastembed's catalogue; register the ONNX export its HF repo ships,
+        # with the mean pooling and normalization sentence-transformers applies
+        if MODEL_NAME.lower() not in {model["model"].lower() for model in TextEmbedding.list_supported_models()}:
+            TextEmbedding.add_custom_model(
+                model=MODEL_NAME,
+                pooling=PoolingType.MEAN,
+                normalization=True,
+                sources=ModelSource(hf=MODEL_NAME),
+                dim=768,
+                model_file="onnx/model.onnx",
+            )
+
+        return FastEmbedEmbeddings(model_name=MODEL_NAME, threads=os.cpu_count(), batch_size=64)
+
+    if torch.cuda.is_available():
+        # GPU encoding is orders of magnitude faster than CPU; fp16 halves memory bandwidth again.
+        # Dynamic int8 quantization below is CPU-only, so this path skips it
+        return HuggingFaceEmbeddings(
+            model_name=MODEL_NAME,
+            model_kwargs={"device": "cuda", "model_kwargs": {"torch_dtype": torch.float16}},
+            encode_kwargs={"batch_size": 128, "normalize_embeddings": True},
+        )
+
+    if os.path.isdir(ONNX_MODEL_DIR):
+        # int8 ONNX model from export_onnx_model.py; runs on VNNI int8 dot-product kernels on x86
+        return HuggingFaceEmbeddings(
+            model_name=ONNX_MODEL_DIR,
+            model_kwargs={"backend": "onnx", "model_kwargs": {"file_name": "onnx/model_qint8_avx512_vnni.onnx"}},
+            encode_kwargs={"batch_size": 64},
+        )
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=MODEL_NAME,
+        encode_kwargs={"batch_size": 64},
+    )
+
+    # Dynamic int8 quantization of the Linear layers: roughly 2x CPU encode throughput, <1% STS loss
+    torch.backends.quantized.engine = "qnnpack" if platform.machine().lower() in ("arm64", "aarch64") else "fbgemm"
+    embeddings._client = torch.quantization.quantize_dynamic(embeddings._client, {torch.nn.Linear}, dtype=torch.qint8)
+    return embeddings
+
+
+EMBEDDINGS = _load_embeddings()
+
+# Wire compression pays off on the embedding-heavy insert traffic (zstandard is in requirements;
+# zlib is the fallback every server supports). w=1 acknowledges on the primary alone
+MONGO_CLIENT = MongoClient(
+    os.getenv("MONGODB_URI"),
+    compressors="zstd,zlib",
+    zlibCompressionLevel=3,
+    maxPoolSize=100,
+    w=1,
+    retryWrites=True,
+)
+# Bulk ingest is idempotent (deterministic ids, upserts), so it can skip waiting on the journal
+BULK_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+
+def get_vector_store(collection_name, index_name):
+    """Atlas vector store over a collection, backed by the shared client and embeddings"""
+    return MongoDBAtlasVectorSearch(
+        collection=MONGO_CLIENT[DB_NAME][collection_name],
+        embedding=EMBEDDINGS,
+        index_name=index_name,
+        relevance_score_fn="cosine",
+    )
+
+
+def _vector_index_definition(dimensions):
+    """Atlas vector index over the embedding field, scalar (int8) quantized inside the index"""
+    return {
+        "fields": [
+            {
+                "type": "vector",
+                "path": "embedding",
+                "numDimensions": dimensions,
+                "similarity": "cosine",
+                # Atlas keeps int8 copies in the HNSW graph: ~4x less index RAM, minor recall loss
+                "quantization": "scalar",
+            }
+        ]
+    }
+
+
+def _create_vector_index(collection, index_name, dimensions):
+    """Create the vector index, creating the collection first as Atlas requires it to exist"""
+    if collection.name not in collection.database.list_collection_names():
+        collection.database.create_collection(collection.name)
+    collection.create_search_index(
+        SearchIndexModel(definition=_vector_index_definition(dimensions), name=index_name, type="vectorSearch")
+    )
+
+
+def _vector_field_matches(definition, expected):
+    """Whether an index definition's vector field has every setting we manage, ignoring Atlas-added keys"""
+    wanted = expected["fields"][0]
+    for field in (definition or {}).get("fields", []):
+        if field.get("type") == "vector" and field.get("path") == wanted["path"]:
+            return all(field.get(key) == value for key, value in wanted.items())
+    return False
+
+
+def ensure_vector_search_index(vector_store, index_name, dimensions=768):
+    """Create the Atlas vector search index once, or upgrade an existing one to the quantized definition"""
+    collection = vector_store.collection
+    definition = _vector_index_definition(dimensions)
+    existing = list(collection.list_search_indexes(index_name))
+    if not existing:
+        _create_vector_index(collection, index_name, dimensions)
+    # Compare only the fields set here, so Atlas normalizing the stored definition doesn't trigger a
+    # rebuild on every boot
+    elif not _vector_field_matches(existing[0].get("latestDefinition"), definition):
+        collection.update_search_index(index_name, definition)
+
+
+def _batched(iterable, size):
+    """Yield lists of up to size items from any iterable without materializing it"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def bulk_add_documents(collection, chunks):
+    """Embed (id, document) chunks in batches and upsert them, overlapping each write with the next encode
+
+    chunks may be a lazy iterable; it is consumed one batch at a time. Returns the number written.
+    """
+    collection = collection.with_options(write_concern=BULK_WRITE_CONCERN)
+    count = 0
+    # A single writer thread upserts batch N while this thread encodes batch N+1 (torch and pymongo
+    # both release the GIL); waiting on the previous write keeps at most two batches in memory
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        pending = None
+        for batch in _batched(chunks, WRITE_BATCH_SIZE):
+            # Longest first so each encode batch holds similar lengths and pads (dynamically) to little
+            # beyond its own max; ids travel with their chunks, so no un-permuting is needed
+            batch.sort(key=lambda pair: len(pair[1].page_content), reverse=True)
+            texts = [doc.page_content for _, doc in batch]
+            vectors = EMBEDDINGS.embed_documents(texts)
+            # Same document shape MongoDBAtlasVectorSearch writes, minus its per-document overhead. Vectors
+            # go over the wire as packed float32 BSON binary rather than arrays of doubles (~3x smaller).
+            # Ids are deterministic per source, so upserting makes re-ingests replace instead of duplicate
+            operations = [
+                ReplaceOne(
+                    {"_id": uid},
+                    {"text": text, "embedding": Binary.from_vector(vector, BinaryVectorDtype.FLOAT32), **doc.metadata},
+                    upsert=True,
+                )
+                for (uid, doc), text, vector in zip(batch, texts, vectors)
+            ]
+            if pending is not None:
+                pending.result()
+            pending = writer.submit(collection.bulk_write, operations, ordered=False)
+            count += len(batch)
+        if pending is not None:
+            pending.result()
+    return count
+
+
+def bulk_load_documents(vector_store, index_name, chunks, dimensions=768):
+    """Insert a large batch with the vector index dropped, then build the index once over the result"""
+    collection = vector_store.collection
+    # Serialize bulk loads (across worker processes too) so two ingests never race the drop/rebuild
+    with FileLock(os.path.join(tempfile.gettempdir(), f"{index_name}.lock")):
+        try:
+            if list(collection.list_search_indexes(index_name)):
+                collection.drop_search_index(index_name)
+                _wait_for_index_drop(collection, index_name)
+            count = bulk_add_documents(collection, chunks)
+        except BaseException:
+            # Put the index back, but never let a failure doing so hide the error that got us here
+            try:
+                _create_index_when_free(collection, index_name, dimensions)
+            except Exception:
+                logger.exception("Could not recreate search index '%s' after a failed bulk load", index_name)
+            raise
+        _create_index_when_free(collection, index_name, dimensions)
+        return count
+
+
+def _wait_for_index_drop(collection, index_name, interval=1, log_every=120):
+    """Atlas drops search indexes asynchronously; block until the name is free to reuse
+
+    There is deliberately no timeout: giving up would leave the collection with no usable index.
+    """
+    started = time.monotonic()
+    while list(collection.list_search_indexes(index_name)):
+        if time.monotonic() - started > log_every:
+            logger.warning("Still waiting for search index '%s' to be dropped", index_name)
+            started = time.monotonic()
+        time.sleep(interval)
+
+
+def _create_index_when_free(collection, index_name, dimensions, interval=1):
+    """Create the vector index once any in-progress drop has released its name; no-op if it still exists"""
+    while True:
+        existing = list(collection.list_search_indexes(index_name))
+        if not existing:
+            _create_vector_index(collection, index_name, dimensions)
+            return
+        if existing[0].get("status") != "DELETING":
+            # The drop never happened, so the original index is still in place
+            return
+        time.sleep(interval)
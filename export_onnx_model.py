@@ -0,0 +1,30 @@
+"""
+One-time export of the mpnet embedding model to int8 ONNX
+
+Produces a dynamically quantized (AVX-512 VNNI) ONNX copy of all-mpnet-base-v2
+that embeddings_singleton.py loads instead of the PyTorch model when the
+output directory exists. Requires: pip install "sentence-transformers[onnx]"
+"""
+
+import os
+import sys
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+ONNX_MODEL_DIR = os.getenv("EMBEDDINGS_ONNX_DIR", "./mpnet-onnx-int8")
+
+def main():
+    """Export the model to ONNX and write the int8 quantized variant next to it"""
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else ONNX_MODEL_DIR
+    
+    print(f"Exporting {MODEL_NAME} to ONNX...")
+    model = SentenceTransformer(MODEL_NAME, backend="onnx")
+    model.save_pretrained(output_dir)
+    
+    print("Quantizing to int8 (avx512_vnni)...")
+    export_dynamic_quantized_onnx_model(model, "avx512_vnni", output_dir)
+    print(f"✅ Saved to {output_dir}/onnx/model_qint8_avx512_vnni.onnx")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+PDF page extraction with an on-disk cache keyed by file content
+
+Re-ingesting the same brochure or resume skips PyPDF parsing entirely; the
+extracted pages are pickled under PDF_CACHE_DIR by the SHA-256 of the bytes.
+Entries hold uploaded resume text, so they are evicted after PDF_CACHE_MAX_AGE_DAYS
+without use, and least recently used first once the cache exceeds PDF_CACHE_MAX_BYTES.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from typing import IO, Optional, Union
+
+from langchain_community.document_loaders.parsers import PyPDFParser
+from langchain_core.documents.base import Blob
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "./pdf_cache")
+PDF_CACHE_MAX_AGE_DAYS = float(os.getenv("PDF_CACHE_MAX_AGE_DAYS", "30"))
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def load_pdf(source: Union[str, IO[bytes]], filename: Optional[str] = None):
+    """Load PDF pages from a file path or binary stream; returns (content hash, lazy page iterator)"""
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            data = f.read()
+        filename = filename or source
+    else:
+        data = source.read()
+
+    file_hash = hashlib.sha256(data).hexdigest()
+    cache_path = os.path.join(PDF_CACHE_DIR, f"{file_hash}.pkl")
+    try:
+        with open(cache_path, "rb") as f:
+            documents = pickle.load(f)
+    except FileNotFoundError:
+        # Never cached, or evicted since; parse it again
+        pass
+    else:
+        # Refresh the mtime so eviction treats the entry as recently used
+        try:
+            os.utime(cache_path)
+        except FileNotFoundError:
+            # Evicted after we read it; the pages are already loaded
+            pass
+        # Same bytes may arrive under a different name; keep the source metadata accurate
+        for document in documents:
+            document.metadata["source"] = filename
+        return file_hash, iter(documents)
+
+    return file_hash, _parse_and_cache(data, filename, cache_path)
+
+
+def _parse_and_cache(data, filename, cache_path):
+    """Yield pages as PyPDF extracts them, caching the extraction once every page has been read"""
+    blob = Blob.from_data(data, path=filename, mime_type="application/pdf")
+    documents = []
+    for document in PyPDFParser().lazy_parse(blob):
+        documents.append(document)
+        yield document
+
+    # Write to a unique temp file and rename so concurrent ingests (threads share a pid) never
+    # collide on the temp name or read a partial pickle
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=PDF_CACHE_DIR, suffix=".tmp", delete=False) as f:
+        pickle.dump(documents, f)
+    os.replace(f.name, cache_path)
+    _evict()
+
+
+def _evict():
+    """Drop entries unused for PDF_CACHE_MAX_AGE_DAYS, then the least recently used until under PDF_CACHE_MAX_BYTES"""
+    entries = []
+    for entry in os.scandir(PDF_CACHE_DIR):
+        if not entry.name.endswith(".pkl"):
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    expiry = time.time() - PDF_CACHE_MAX_AGE_DAYS * 86400
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if mtime >= expiry and total <= PDF_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another ingest evicted it first
+            pass
+        total -= size
@@ -1,10 +1,11 @@
 # The backend python file which will use FastAPI to create the API endpoints
+import hashlib
 import os
+from typing import IO, Optional, Union
 from dotenv import load_dotenv
 load_dotenv(override=True)
 # from pymongo.mongo_client import MongoClient
 # from pymongo.server_api import ServerApi
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.document_loaders import WebBaseLoader
 
 # # Create a new client and connect to the server
@@ -16,38 +17,25 @@ from langchain_community.document_loaders import WebBaseLoader
 #     print("Pinged your deployment. You successfully connected to MongoDB!")
 # except Exception as e:
 #     print(e)
-uri=os.getenv("MONGODB_URI")
-
-from langchain_huggingface import HuggingFaceEmbeddings
-
-embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
+from pdf_cache import load_pdf
+from embeddings_singleton import MONGO_CLIENT, DB_NAME, bulk_add_documents, bulk_load_documents, ensure_vector_search_index, get_vector_store
 
 # if embeddings:
 #     print("Embeddings model loaded successfully!")
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_mongodb import MongoDBAtlasVectorSearch
-from pymongo import MongoClient
-from uuid import uuid4
-
-# initialize MongoDB python client
-client = MongoClient(uri)
+from chunking import split_pages
 
-DB_NAME = "college_seeker"
 COLLECTION_NAME = "student_collection"
 ATLAS_VECTOR_SEARCH_INDEX_NAME = "student-index-vectorstores"
 
-MONGODB_COLLECTION = client[DB_NAME][COLLECTION_NAME]
+MONGODB_COLLECTION = MONGO_CLIENT[DB_NAME][COLLECTION_NAME]
 
-vector_store = MongoDBAtlasVectorSearch(
-    collection=MONGODB_COLLECTION,
-    embedding=embeddings,
-    index_name=ATLAS_VECTOR_SEARCH_INDEX_NAME,
-    relevance_score_fn="cosine",
-)
+vector_store = get_vector_store(COLLECTION_NAME, ATLAS_VECTOR_SEARCH_INDEX_NAME)
 
-# Create vector search index on the collection
-# Since we are using the default OpenAI embedding model (ada-v2) we need to specify the dimensions as 1536
-vector_store.create_vector_search_index(dimensions=768)
+
+def ensure_index():
+    """Create the student vector search index if missing; called once at startup, not per ingest"""
+    # all-mpnet-base-v2 produces 768-dimensional embeddings
+    ensure_vector_search_index(vector_store, ATLAS_VECTOR_SEARCH_INDEX_NAME, dimensions=768)
 
 
 # from uuid import uuid4
@@ -119,31 +107,29 @@ vector_store.create_vector_search_index(dimensions=768)
 # uuids = [str(uuid4()) for _ in range(len(documents))]
 
 # vector_store.add_documents(documents=documents, ids=uuids)
-def ingest_student_pdf(file_path):
-    loader = PyPDFLoader(file_path)
-    documents = loader.load()
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-    )
-    docs = text_splitter.split_documents(documents)
 
-    uuids = [str(uuid4()) for _ in range(len(docs))]
 
-    vector_store.add_documents(documents=docs, ids=uuids)
-    return f"Successfully ingested {file_path} with {len(docs)} chunks"
+def ingest_student_pdf(source: Union[str, IO[bytes]], filename: Optional[str] = None, bulk: bool = False):
+    file_hash, pages = load_pdf(source, filename)
+
+    # Content-derived ids make re-ingesting the same resume idempotent
+    chunks = ((f"{file_hash}:{i}", doc) for i, doc in enumerate(split_pages(pages)))
+
+    # Large offline loads skip per-insert index maintenance and rebuild the index once at the end.
+    # bulk drops the shared index (searches and other ingests run without it), so it is not exposed over the API
+    if bulk:
+        count = bulk_load_documents(vector_store, ATLAS_VECTOR_SEARCH_INDEX_NAME, chunks, dimensions=768)
+    else:
+        count = bulk_add_documents(MONGODB_COLLECTION, chunks)
+    return f"Successfully ingested {filename or source} with {count} chunks"
 
 
 def ingest_student_web(url):
     loader=WebBaseLoader(url)
-    documents=loader.load()
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-    )
-    docs = text_splitter.split_documents(documents)
-    uuids = [str(uuid4()) for _ in range(len(docs))]
-    vector_store.add_documents(documents=docs, ids=uuids)
-    return f"Successfully ingested {url} with {len(docs)} chunks"
\ No newline at end of file
+    # Ids derive from the URL so a re-crawl replaces the page's chunks; drop any it no longer has
+    url_hash = hashlib.sha256(url.encode()).hexdigest()
+    chunks = ((f"{url_hash}:{i}", doc) for i, doc in enumerate(split_pages(loader.lazy_load())))
+    count = bulk_add_documents(MONGODB_COLLECTION, chunks)
+    uuids = [f"{url_hash}:{i}" for i in range(count)]
+    MONGODB_COLLECTION.delete_many({"_id": {"$regex": f"^{url_hash}:", "$nin": uuids}})
+    return f"Successfully ingested {url} with {count} chunks"
\ No newline at end of file